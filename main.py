@@ -1,16 +1,56 @@
 import os
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterable, Callable, Optional, Set, Tuple
 import csv
-import io
+import hashlib
+import logging
+import re
+import time
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
+import numpy as np
+import orjson
+import pyarrow as pa
+from pyarrow import compute as pc
+from pyarrow import csv as pacsv
 from bson import ObjectId
+from cachetools import TTLCache
 
 from database import db, create_document, get_documents
 from schemas import Dataset, Record
 
-app = FastAPI()
+
+def _json_default(obj: Any) -> Any:
+    """Encode values orjson has no native form for (ObjectId, Decimal)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+class AppJSONResponse(ORJSONResponse):
+    """
+    orjson-encoded responses; previews and query rows can be wide. Endpoints
+    return it directly so the payload skips FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(default_response_class=AppJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +61,371 @@ app.add_middleware(
 )
 
 
+# Infer column types simple heuristic
+_NUM_RE = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+_BOOL_RE = re.compile(r"^(true|false)$", re.I)
+# very light date detection
+_DATE_RE = re.compile(r"^\d{1,4}[-/]\d{1,2}([-/]\d{1,4})?")
+
+
+def arrow_column_type(t: pa.DataType) -> str:
+    """Map an Arrow column type to: string, number, boolean, date"""
+    if pa.types.is_integer(t) or pa.types.is_floating(t):
+        return "number"
+    if pa.types.is_boolean(t):
+        return "boolean"
+    if pa.types.is_date(t) or pa.types.is_timestamp(t):
+        return "date"
+    return "string"
+
+
+def text_array(values: pa.Array) -> pa.Array:
+    """Decode a raw column as UTF-8, dropping invalid bytes as the csv module path did"""
+    try:
+        return values.cast(pa.string())
+    except pa.ArrowInvalid:
+        return pa.array(
+            [v.decode("utf-8", errors="ignore") if v is not None else None for v in values.to_pylist()],
+            type=pa.string(),
+        )
+
+
+def read_head(f) -> pa.Table:
+    """Parse the first block with Arrow's type inference; its types seed the column labels"""
+    f.seek(0)
+    reader = pacsv.open_csv(
+        f,
+        read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(invalid_row_handler=lambda row: "skip"),
+        convert_options=pacsv.ConvertOptions(null_values=[""]),
+    )
+    try:
+        return pa.Table.from_batches([reader.read_next_batch()])
+    except StopIteration:
+        return reader.schema.empty_table()
+
+
+class CsvBlocks:
+    """
+    Block-by-block reader over an upload with every column read as raw text;
+    values are typed per cell when documents are built (see stored_values).
+    Rows with too few fields are kept, padded with nulls as csv.DictReader
+    did, and follow the other rows of their block. Rows with too many fields
+    are skipped and counted in skipped.
+    """
+
+    def __init__(self, f, names: List[str]):
+        f.seek(0)
+        self.skipped = 0
+        self._short_rows: List[List[Optional[str]]] = []
+        self.reader = pacsv.open_csv(
+            f,
+            read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+            parse_options=pacsv.ParseOptions(invalid_row_handler=self._invalid_row),
+            convert_options=pacsv.ConvertOptions(column_types={n: pa.binary() for n in names}),
+        )
+        self.names = self.reader.schema.names
+
+    def _invalid_row(self, row) -> str:
+        if row.actual_columns < row.expected_columns:
+            fields = next(csv.reader([row.text]), [])
+            self._short_rows.append(fields + [None] * (row.expected_columns - len(fields)))
+        else:
+            self.skipped += 1
+        return "skip"
+
+    def next_batch(self) -> Optional[pa.RecordBatch]:
+        """Read the next block as string columns, or None at end of file"""
+        try:
+            batch = self.reader.read_next_batch()
+        except StopIteration:
+            return None
+        arrays = [text_array(col) for col in batch.columns]
+        if self._short_rows:
+            rows, self._short_rows = self._short_rows, []
+            arrays = [
+                pa.concat_arrays([a, pa.array([r[i] for r in rows], type=pa.string())])
+                for i, a in enumerate(arrays)
+            ]
+        return pa.RecordBatch.from_arrays(arrays, names=self.names)
+
+
+async def read_batches(blocks: CsvBlocks, first: Optional[pa.RecordBatch]):
+    """Yield parsed blocks, reading each one in a worker thread"""
+    batch = first
+    while batch is not None:
+        yield batch
+        batch = await asyncio.to_thread(blocks.next_batch)
+
+
+# Number columns are kept as text when numbers would change the uploaded values
+_ZERO_PADDED_PATTERN = r"^[+-]?0\d"
+_LONG_INT_PATTERN = r"^[+-]?\d{16,}$"
+_CLEAN_INT_PATTERN = r"^[+-]?(0|[1-9]\d*)$"
+MAX_SAFE_INTEGER = 2 ** 53
+
+
+def needs_text(values: pa.Array) -> bool:
+    """
+    True if a number column holds values numbers can't keep as uploaded:
+    zero-padded identifiers (ZIP codes, 007) or integers beyond ±2^53
+    """
+    stripped = pc.utf8_trim_whitespace(values)
+    if pc.any(pc.match_substring_regex(stripped, _ZERO_PADDED_PATTERN)).as_py():
+        return True
+    long_ints = pc.filter(stripped, pc.match_substring_regex(stripped, _LONG_INT_PATTERN))
+    return any(abs(int(v)) > MAX_SAFE_INTEGER for v in long_ints.to_pylist())
+
+
+def _cast_where(stripped: pa.Array, mask: pa.Array, to: pa.DataType) -> List[Any]:
+    """Cast the cells selected by mask (Arrow rejects a leading +), None elsewhere"""
+    unsigned = pc.replace_substring_regex(stripped, r"^\+", "")
+    return pc.if_else(mask, unsigned, pa.scalar(None, pa.string())).cast(to).to_pylist()
+
+
+def number_values(values: pa.Array) -> List[Any]:
+    """
+    Cells of a number column as stored: integers as int, other numbers as
+    float, empty cells as None and anything else (N/A, -) as its text
+    """
+    stripped = pc.utf8_trim_whitespace(values)
+    is_int = pc.match_substring_regex(stripped, _CLEAN_INT_PATTERN)
+    ints = _cast_where(stripped, is_int, pa.int64())
+    if pc.sum(is_int).as_py() == pc.sum(pc.greater(pc.utf8_length(stripped), 0)).as_py():
+        return ints
+    is_float = pc.and_(pc.match_substring_regex(stripped, _NUM_RE.pattern), pc.invert(is_int))
+    floats = _cast_where(stripped, is_float, pa.float64())
+    return [
+        i if i is not None else f if f is not None else (v or None)
+        for i, f, v in zip(ints, floats, values.to_pylist())
+    ]
+
+
+def boolean_values(values: pa.Array) -> List[Any]:
+    """Cells of a boolean column as stored: true/false in any case as bool, empty as None, else text"""
+    lowered = pc.utf8_lower(pc.utf8_trim_whitespace(values)).to_pylist()
+    return [
+        True if s == "true" else False if s == "false" else (v or None)
+        for s, v in zip(lowered, values.to_pylist())
+    ]
+
+
+# Labels whose values are stored typed; dates and everything else are stored as uploaded
+_STORED_VALUES: Dict[str, Callable[[pa.Array], List[Any]]] = {
+    "number": number_values,
+    "boolean": boolean_values,
+}
+
+
+def stored_kind(column_type: str) -> str:
+    """How values of a column with this label are stored: number, boolean or string"""
+    return column_type if column_type in _STORED_VALUES else "string"
+
+
+def stored_values(batch: pa.RecordBatch, stored_types: Dict[str, str]) -> List[List[Any]]:
+    """Each column of a text batch as the Python values stored for it"""
+    return [
+        _STORED_VALUES[stored_types[name]](col) if stored_types[name] in _STORED_VALUES else col.to_pylist()
+        for name, col in zip(batch.schema.names, batch.columns)
+    ]
+
+
+TYPE_IDX = {"string": 0, "number": 1, "boolean": 2, "date": 3}
+TYPE_NAMES = list(TYPE_IDX)
+
+
+def type_votes(values: pa.ChunkedArray) -> np.ndarray:
+    """
+    Count how many values look like each type, in TYPE_IDX order. The regexes
+    run as Arrow compute kernels over the whole sample instead of per cell in
+    Python; empty and unmatched values count as strings. The patterns never
+    overlap, so once one type holds a strict majority the rest are skipped.
+    """
+    stripped = pc.utf8_trim_whitespace(values)
+    counts = np.zeros(len(TYPE_IDX), dtype=np.int32)
+    remaining = len(values)
+    for name, regex in (("number", _NUM_RE), ("date", _DATE_RE), ("boolean", _BOOL_RE)):
+        mask = pc.match_substring_regex(stripped, regex.pattern, ignore_case=bool(regex.flags & re.I))
+        counts[TYPE_IDX[name]] = n = pc.sum(mask).as_py() or 0
+        remaining -= n
+        if n * 2 > len(values):
+            break
+    counts[TYPE_IDX["string"]] = remaining
+    return counts
+
+
+def infer_column_types(table: pa.Table, sample_limit: int = 100) -> Dict[str, str]:
+    """
+    Column types come from Arrow's inference over the first block; columns it could
+    only read as strings fall back to a majority vote over the first rows so
+    loose dates (01/02/2024) and mostly-numeric columns keep their labels.
+    """
+    column_types: Dict[str, str] = {
+        name: arrow_column_type(t) for name, t in zip(table.column_names, table.schema.types)
+    }
+    sample = table.slice(0, sample_limit)
+    # All-empty columns come back as Arrow's null type and stay "string"
+    string_idx = [i for i, t in enumerate(table.schema.types) if pa.types.is_string(t)]
+    if not string_idx or not sample.num_rows:
+        return column_types
+
+    # One row of type votes per column, resolved with argmax
+    votes = np.zeros((len(string_idx), len(TYPE_IDX)), dtype=np.int32)
+    for row, i in enumerate(string_idx):
+        votes[row] = type_votes(sample.column(i))
+    names = table.column_names
+    column_types.update(
+        {names[i]: TYPE_NAMES[w] for i, w in zip(string_idx, votes.argmax(axis=1).tolist())}
+    )
+    return column_types
+
+
+# Inferred schemas keyed by (header, signature of the inference input), kept in
+# process so re-uploads of a known file skip inference without a database round trip
+SCHEMA_CACHE_SIZE = 256
+SCHEMA_SAMPLE_ROWS = 100
+_schema_cache: Dict[Tuple[Tuple[str, ...], str], Dict[str, str]] = {}
+
+
+def sample_signature(table: pa.Table) -> str:
+    """
+    Hash everything infer_column_types reads: the Arrow type of every
+    column, and the sampled values of the string columns it votes on
+    """
+    sig = hashlib.blake2b(",".join(str(t) for t in table.schema.types).encode(), digest_size=16)
+    sample = table.slice(0, SCHEMA_SAMPLE_ROWS)
+    for i, t in enumerate(table.schema.types):
+        if pa.types.is_string(t):
+            sig.update(repr(sample.column(i).to_pylist()).encode())
+    return sig.hexdigest()
+
+
+def lookup_schema(key: Tuple[Tuple[str, ...], str]) -> Optional[Dict[str, str]]:
+    """Return cached column types for an upload signature, or None on a miss"""
+    column_types = _schema_cache.pop(key, None)
+    if column_types is not None:
+        _schema_cache[key] = column_types
+    return column_types
+
+
+def store_schema(key: Tuple[Tuple[str, ...], str], column_types: Dict[str, str]):
+    _schema_cache[key] = column_types
+    if len(_schema_cache) > SCHEMA_CACHE_SIZE:
+        del _schema_cache[next(iter(_schema_cache))]
+
+
+CSV_BLOCK_SIZE = 1 << 20
+INSERT_CHUNK_SIZE = 5_000
+INSERT_QUEUE_SIZE = 4
+COLUMN_LIMIT_MAX = 100_000
+
+
+def record_docs(
+    names: List[str], values: List[List[Any]], dataset_id: str, now: datetime
+) -> List[Dict[str, Any]]:
+    """Build record documents (with timestamps like create_document) from stored column values"""
+    return [
+        {"dataset_id": dataset_id, "data": dict(zip(names, row)), "created_at": now, "updated_at": now}
+        for row in zip(*values)
+    ]
+
+
+class TextColumnsFound(Exception):
+    """Later blocks showed that these number columns have to be stored as text"""
+
+    def __init__(self, columns: Set[str]):
+        super().__init__(", ".join(sorted(columns)))
+        self.columns = columns
+
+
+async def insert_records(
+    batches: AsyncIterable[pa.RecordBatch], stored_types: Dict[str, str], dataset_id: str, max_preview: int
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Insert rows as record documents and return how many were written, plus the first max_preview rows taken from the
+    documents already built.
+    Parsing and building documents overlap with the previous chunk's insert
+    through a bounded queue, so at most INSERT_QUEUE_SIZE chunks are held in memory.
+    Raises TextColumnsFound, after reading the whole file, if number columns
+    turn out to need text storage (see needs_text).
+    """
+    now = datetime.now(timezone.utc)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=INSERT_QUEUE_SIZE)
+    preview_rows: List[Dict[str, Any]] = []
+    number_columns = {name for name, kind in stored_types.items() if kind == "number"}
+
+    def stop_consumer():
+        # Drop queued chunks and stop the consumer after its in-flight insert,
+        # so callers cleaning up see every written document
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def produce():
+        to_text: Set[str] = set()
+        try:
+            async for batch in batches:
+                names = batch.schema.names
+                found = {
+                    name for name, col in zip(names, batch.columns)
+                    if name in number_columns and name not in to_text and needs_text(col)
+                }
+                if found and not to_text:
+                    stop_consumer()
+                to_text |= found
+                if to_text:
+                    # Keep scanning without writing, so one re-read covers every such column
+                    continue
+                for offset in range(0, batch.num_rows, INSERT_CHUNK_SIZE):
+                    part = batch.slice(offset, INSERT_CHUNK_SIZE)
+                    values = stored_values(part, stored_types)
+                    docs = record_docs(names, values, dataset_id, now)
+                    if len(preview_rows) < max_preview:
+                        preview_rows.extend(d["data"] for d in docs[: max_preview - len(preview_rows)])
+                    await queue.put(docs)
+        except Exception:
+            stop_consumer()
+            raise
+        if to_text:
+            raise TextColumnsFound(to_text)
+        await queue.put(None)
+
+    async def consume() -> int:
+        inserted = 0
+        while (docs := await queue.get()) is not None:
+            if docs:
+                await db["record"].insert_many(docs, ordered=False, bypass_document_validation=True)
+            inserted += len(docs)
+        return inserted
+
+    producer = asyncio.create_task(produce())
+    consumer = asyncio.create_task(consume())
+    try:
+        inserted = await consumer
+    except BaseException:
+        producer.cancel()
+        raise
+    # Re-raises a parse error only once the consumer has stopped writing
+    await producer
+    return inserted, preview_rows
+
+
+@app.on_event("startup")
+async def ensure_indexes():
+    """
+    Index records by dataset and by every data.* field so query filters can
+    use an IXSCAN; (dataset_id, _id) also serves dataset lookups and reads in upload order
+    """
+    if db is None:
+        return
+    try:
+        await db["record"].create_index([("dataset_id", 1), ("_id", 1)])
+        await db["record"].create_index([("data.$**", 1)])
+    except Exception as e:
+        # Don't block startup on an unreachable database; /test reports it
+        logger.warning("Could not create indexes: %s", e)
+
+
 @app.get("/")
 def read_root():
     return {"message": "Interactive Tables API is running"}
@@ -35,93 +440,207 @@ async def upload_csv(file: UploadFile = File(...)):
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
 
-    content = await file.read()
+    # Parse the spooled upload block by block instead of buffering it in memory
     try:
-        text = content.decode("utf-8", errors="ignore")
-    except Exception:
-        raise HTTPException(status_code=400, detail="Unable to decode file as UTF-8")
+        head_table = await asyncio.to_thread(read_head, file.file)
+        blocks = await asyncio.to_thread(CsvBlocks, file.file, head_table.column_names)
+        first = await asyncio.to_thread(blocks.next_batch)
+    except pa.ArrowInvalid as e:
+        if "Empty CSV file" in str(e):
+            raise HTTPException(status_code=400, detail="CSV has no header row")
+        raise HTTPException(status_code=400, detail=f"Unable to parse CSV: {str(e)[:100]}")
 
-    reader = csv.DictReader(io.StringIO(text))
-    columns = reader.fieldnames or []
+    columns = blocks.names
     if not columns:
         raise HTTPException(status_code=400, detail="CSV has no header row")
 
-    # Collect rows (limit for preview, but we will insert all)
-    rows: List[Dict[str, Any]] = []
-    preview_rows: List[Dict[str, Any]] = []
-
-    # Infer column types simple heuristic
-    def infer_type(value: str) -> str:
-        if value is None or value == "":
-            return "string"
-        v = value.strip()
-        if v.lower() in {"true", "false"}:
-            return "boolean"
-        try:
-            int(v)
-            return "number"
-        except:
-            pass
-        try:
-            float(v)
-            return "number"
-        except:
-            pass
-        # very light date detection
-        if any(sep in v for sep in ["-", "/"]) and any(ch.isdigit() for ch in v):
-            return "date"
-        return "string"
-
-    # Determine types by sampling first 100 rows
-    type_counts: Dict[str, Dict[str, int]] = {c: {} for c in columns}
     max_preview = 50
-    sample_limit = 100
-    for i, row in enumerate(reader):
-        rows.append(row)
-        if len(preview_rows) < max_preview:
-            preview_rows.append(row)
-        if i < sample_limit:
-            for c in columns:
-                t = infer_type(row.get(c))
-                type_counts[c][t] = type_counts[c].get(t, 0) + 1
-
-    column_types: Dict[str, str] = {}
-    for c in columns:
-        if type_counts[c]:
-            column_types[c] = max(type_counts[c].items(), key=lambda kv: kv[1])[0]
-        else:
-            column_types[c] = "string"
+    schema_key = (tuple(columns), sample_signature(head_table))
+    column_types = lookup_schema(schema_key)
+    if column_types is None:
+        column_types = infer_column_types(head_table, SCHEMA_SAMPLE_ROWS)
+        store_schema(schema_key, column_types)
+    # Columns the cached labels can't cover are checked per upload on the raw text
+    column_types = dict(column_types)
+    if first is not None:
+        for name, col in zip(columns, first.columns):
+            if column_types[name] == "number" and needs_text(col):
+                column_types[name] = "string"
+    stored_types = {name: stored_kind(t) for name, t in column_types.items()}
 
     # Create dataset document
     dataset = Dataset(
         name=file.filename,
         columns=columns,
         column_types=column_types,
-        row_count=len(rows),
+        stored_types=stored_types,
     )
-    dataset_id = create_document("dataset", dataset)
+    dataset_id = await create_document("dataset", dataset)
 
     # Insert rows
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    recs = [{"dataset_id": dataset_id, "data": r} for r in rows]
-    # Add timestamps like create_document
-    from datetime import datetime, timezone
-    now = datetime.now(timezone.utc)
-    for r in recs:
-        r["created_at"] = now
-        r["updated_at"] = now
-    if recs:
-        db["record"].insert_many(recs)
+    while True:
+        try:
+            row_count, preview_rows = await insert_records(
+                read_batches(blocks, first), stored_types, dataset_id, max_preview
+            )
+            break
+        except TextColumnsFound as e:
+            # Later blocks had zero-padded or oversized integers in these number
+            # columns; discard what was written and read the file once more
+            await db["record"].delete_many({"dataset_id": dataset_id})
+            for name in e.columns:
+                column_types[name] = stored_types[name] = "string"
+            blocks = await asyncio.to_thread(CsvBlocks, file.file, head_table.column_names)
+            first = await asyncio.to_thread(blocks.next_batch)
+        except pa.ArrowInvalid as e:
+            # Malformed CSV (e.g. an unterminated quote) in a later block
+            await db["record"].delete_many({"dataset_id": dataset_id})
+            await db["dataset"].delete_one({"_id": ObjectId(dataset_id)})
+            invalidate_datasets()
+            raise HTTPException(status_code=400, detail=f"Unable to parse CSV: {str(e)[:100]}")
+    await db["dataset"].update_one(
+        {"_id": ObjectId(dataset_id)},
+        {"$set": {
+            "row_count": row_count,
+            "column_types": column_types,
+            "stored_types": stored_types,
+            "updated_at": datetime.now(timezone.utc),
+        }},
+    )
+    _STORED_TYPES_CACHE.pop(dataset_id, None)
+    invalidate_datasets()
 
-    return {
+    return AppJSONResponse({
         "dataset_id": dataset_id,
         "name": dataset.name,
         "columns": columns,
         "column_types": column_types,
-        "row_count": len(rows),
+        "row_count": row_count,
+        "skipped_rows": blocks.skipped,
         "preview": preview_rows,
-    }
+    })
+
+
+_CONTAINS_RE = re.compile(r"contains\s+([\w.-]+)\s+(.+)", re.I)
+# Column names are matched lazily so headers like "first name" or "unit-price" work
+_OP_RE = re.compile(r"^(?P<col>.+?)\s*(?P<op>>=|<=|!=|>|<|=|\bis\b)\s*(?P<val>.+)$", re.I)
+_OP_ALIASES = {"is": "="}
+_INT_RE = re.compile(r"^[+-]?\d+$")
+_FLOAT_RE = re.compile(r"^[+-]?(\d+\.\d*|\.\d+)$")
+_MONGO_OP_MAP = {
+    "=": "$eq",
+    "!=": "$ne",
+    ">": "$gt",
+    "<": "$lt",
+    ">=": "$gte",
+    "<=": "$lte",
+}
+
+
+def cast_value(val: str, kind: Optional[str] = None) -> Any:
+    """
+    Cast a query literal to match how its column is stored (see
+    Dataset.stored_types): string columns compare as text, number and boolean
+    columns take a number/boolean when the literal looks like one, and text
+    otherwise (for cells like N/A). Without a stored kind, cast to
+    bool/int/float when it looks like one.
+    """
+    if kind == "string":
+        return val
+    if kind != "number" and _BOOL_RE.match(val):
+        return val[0] in "tT"
+    if kind != "boolean":
+        if _INT_RE.match(val):
+            return int(val)
+        if _FLOAT_RE.match(val):
+            return float(val)
+    return val
+
+
+def contains_clause(field: str, val: str, kind: Optional[str]) -> Dict[str, Any]:
+    """Case-insensitive substring match; number and boolean columns are matched on their text"""
+    if kind in _STORED_VALUES:
+        text = {"$ifNull": [{"$toString": f"${field}"}, ""]}
+        return {"$expr": {"$regexMatch": {"input": text, "regex": val, "options": "i"}}}
+    return {field: {"$regex": val, "$options": "i"}}
+
+
+QueryShape = Tuple[Tuple[str, str], ...]
+
+
+@lru_cache(maxsize=1024)
+def split_query(text: str) -> Tuple[QueryShape, Tuple[str, ...]]:
+    """
+    Split a query into its shape of (column, op) pairs and its raw values, e.g.
+    "price > 100 and country = US" -> ((("price", ">"), ("country", "=")), ("100", "US"))
+    Raises ValueError for a clause that can't be parsed.
+    """
+    shape_parts: List[Tuple[str, str]] = []
+    values: List[str] = []
+    for c in text.strip().split(" and "):
+        c = c.strip()
+        if not c:
+            continue
+        m = _CONTAINS_RE.match(c)
+        if m:
+            # contains column value
+            # e.g., contains name John
+            shape_parts.append((m[1], "contains"))
+            values.append(m[2].strip())
+            continue
+        m = _OP_RE.match(c)
+        if not m:
+            raise ValueError(c)
+        op = m["op"].lower()
+        shape_parts.append((m["col"].strip(), _OP_ALIASES.get(op, op)))
+        values.append(m["val"].strip())
+    return tuple(shape_parts), tuple(values)
+
+
+@lru_cache(maxsize=256)
+def compile_shape(shape: QueryShape, kinds: Tuple[Optional[str], ...]) -> Callable[[Tuple[str, ...]], tuple]:
+    """
+    Turn a query shape (and the stored kind of each clause's column) into a
+    builder that only has to cast values and fill them into the clause
+    templates; field names and operators are fixed here.
+    """
+    templates = [(f"data.{col}", op, kind) for (col, op), kind in zip(shape, kinds)]
+
+    def build(values: Tuple[str, ...]) -> tuple:
+        return tuple(
+            contains_clause(field, val, kind)
+            if op == "contains"
+            else {field: {_MONGO_OP_MAP[op]: cast_value(val, kind)}}
+            for (field, op, kind), val in zip(templates, values)
+        )
+
+    return build
+
+
+def parse_query(text: str, stored_types: Dict[str, str]) -> tuple:
+    """
+    Build the MongoDB filter clauses for a query string. Parsing is cached
+    per query text, and new values for a known shape reuse its compiled
+    builder. Raises ValueError for a clause that can't be parsed.
+    """
+    shape, values = split_query(text)
+    kinds = tuple(stored_types.get(col) for col, _ in shape)
+    return compile_shape(shape, kinds)(values)
+
+
+# Dataset.stored_types per dataset id, used to cast query literals
+_STORED_TYPES_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+
+async def dataset_stored_types(dataset_id: str) -> Dict[str, str]:
+    stored = _STORED_TYPES_CACHE.get(dataset_id)
+    if stored is None and ObjectId.is_valid(dataset_id):
+        doc = await db["dataset"].find_one({"_id": ObjectId(dataset_id)}, {"stored_types": 1})
+        if doc:
+            stored = _STORED_TYPES_CACHE[dataset_id] = doc.get("stored_types", {})
+    return stored or {}
 
 
 class QueryRequest(BaseModel):
@@ -144,78 +663,88 @@ async def query_dataset(req: QueryRequest):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
 
-    # Build MongoDB filter from naive parsing
-    text = req.query.strip()
-    if not text:
-        filter_dict: Dict[str, Any] = {"dataset_id": req.dataset_id}
+    try:
+        and_parts = parse_query(req.query, await dataset_stored_types(req.dataset_id))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not understand query clause: {str(e)[:100]}")
+    if and_parts:
+        filter_dict: Dict[str, Any] = {"$and": [{"dataset_id": req.dataset_id}, *and_parts]}
     else:
-        clauses = [c.strip() for c in text.split(" and ") if c.strip()]
         filter_dict = {"dataset_id": req.dataset_id}
-        and_parts = []
-        for c in clauses:
-            # patterns
-            if c.lower().startswith("contains "):
-                # contains column value
-                # e.g., contains name John
-                parts = c.split()
-                if len(parts) >= 3:
-                    col = parts[1]
-                    val = " ".join(parts[2:])
-                    and_parts.append({f"data.{col}": {"$regex": val, "$options": "i"}})
-                continue
-            for op in [">=", "<=", ">", "<", "=", "!=", " is "]:
-                if op in c:
-                    col, val = c.split(op, 1)
-                    col = col.strip()
-                    val = val.strip()
-                    # normalize op
-                    if op.strip() == "is":
-                        op_tok = "="
-                    else:
-                        op_tok = op
-                    # cast numbers/bool
-                    if val.lower() in ["true", "false"]:
-                        v_cast: Any = True if val.lower() == "true" else False
-                    else:
-                        try:
-                            if "." in val:
-                                v_cast = float(val)
-                            else:
-                                v_cast = int(val)
-                        except:
-                            v_cast = val
-                    mongo_op_map = {
-                        "=": "$eq",
-                        "!=": "$ne",
-                        ">": "$gt",
-                        "<": "$lt",
-                        ">=": "$gte",
-                        "<=": "$lte",
-                    }
-                    if op_tok in mongo_op_map:
-                        and_parts.append({f"data.{col}": {mongo_op_map[op_tok]: v_cast}})
-                    break
-        if and_parts:
-            filter_dict = {"$and": [{"dataset_id": req.dataset_id}] + and_parts}
-
-    docs = list(db["record"].find(filter_dict).limit(min(max(req.limit, 1), 1000)))
-    rows = [d.get("data", {}) for d in docs]
-    return {"rows": rows, "count": len(rows)}
+
+    limit = min(max(req.limit, 1), 1000)
+    # Limit and unwrap "data" on the server so only the row fields are sent back
+    rows = await db["record"].aggregate([
+        {"$match": filter_dict},
+        {"$limit": limit},
+        {"$replaceRoot": {"newRoot": "$data"}},
+    ]).to_list(length=limit)
+    return AppJSONResponse({"rows": rows, "count": len(rows)})
+
+
+# The /api/datasets listing, served for up to 30s; uploads invalidate it
+_DATASETS_CACHE: TTLCache = TTLCache(maxsize=1, ttl=30)
+_datasets_version = 0
+
+
+def invalidate_datasets():
+    """Drop the cached listing; a listing read before this call won't be stored"""
+    global _datasets_version
+    _datasets_version += 1
+    _DATASETS_CACHE.clear()
 
 
 @app.get("/api/datasets")
 async def list_datasets():
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    docs = list(db["dataset"].find({}, {"name": 1, "columns": 1, "row_count": 1}))
-    for d in docs:
-        d["_id"] = str(d["_id"]) if "_id" in d else None
-    return {"datasets": docs}
+    listing = _DATASETS_CACHE.get("datasets")
+    if listing is None:
+        version = _datasets_version
+        docs = await db["dataset"].aggregate([
+            {"$project": {"name": 1, "columns": 1, "row_count": 1}},
+            {"$addFields": {"_id": {"$toString": "$_id"}}},
+        ]).to_list(length=None)
+        listing = {"datasets": docs}
+        # An upload that finished meanwhile may not be reflected in docs
+        if version == _datasets_version:
+            _DATASETS_CACHE["datasets"] = listing
+    return AppJSONResponse(listing)
+
+
+@app.get("/api/datasets/{dataset_id}/columns/{column}")
+async def get_column(dataset_id: str, column: str, limit: int = 1000):
+    """
+    Return the first values of a single column in upload order. Only that
+    field is projected on the server, so the other columns are never sent back.
+    """
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not available")
+    if column not in await dataset_stored_types(dataset_id):
+        return AppJSONResponse({"column": column, "values": [], "count": 0})
+    limit = min(max(limit, 1), COLUMN_LIMIT_MAX)
+    docs = await db["record"].aggregate([
+        {"$match": {"dataset_id": dataset_id}},
+        {"$sort": {"_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "value": f"$data.{column}"}},
+    ]).to_list(length=limit)
+    values = [d.get("value") for d in docs]
+    return AppJSONResponse({"column": column, "values": values, "count": len(values)})
+
+
+# Encoded body of the last healthy /test response, reused for TEST_CACHE_TTL seconds
+TEST_CACHE_TTL = 5.0
+_test_cache: Optional[Tuple[float, bytes]] = None
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     """Test endpoint to check if database is available and accessible"""
+    global _test_cache
+    if _test_cache and time.monotonic() - _test_cache[0] < TEST_CACHE_TTL:
+        return Response(_test_cache[1], media_type="application/json")
+
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -231,7 +760,7 @@ def test_database():
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await db.list_collection_names()
                 response["collections"] = collections[:10]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
@@ -243,7 +772,11 @@ def test_database():
 
     response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
     response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
-    return response
+    body = orjson.dumps(response)
+    # Only cache a working connection so failures are re-checked on every probe
+    if response["database"] == "✅ Connected & Working":
+        _test_cache = (time.monotonic(), body)
+    return Response(body, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -48,6 +48,7 @@ class Dataset(BaseModel):
     name: str = Field(..., description="Dataset name provided by user")
     columns: List[str] = Field(..., description="Column names in the dataset")
     column_types: Dict[str, str] = Field(..., description="Inferred type per column: string, number, boolean, date")
+    stored_types: Dict[str, str] = Field(default_factory=dict, description="How each column's values are stored: string, number, boolean")
     row_count: int = Field(0, ge=0, description="Total number of rows stored")
 
 class Record(BaseModel):